@@ -1,12 +1,19 @@
 import streamlit as st
 import pandas as pd
-from datetime import datetime, timedelta
-import pytz
+from datetime import datetime
 import base64
+import uuid
+from reminder_engine import ReminderEngine
+from course_search import CourseSearchIndex, match_keyword
+from course_diff import reimport_courses
+from memory_governor import MemoryGovernor, streamlit_session_closed, streamlit_session_id
+from course_analytics import UtilizationRollup
+from course_excel import read_course_excel
 
 # ====================== 背景设置+活力风UI样式 ======================
 def set_page_background():
     st.sidebar.header("🎨 背景自定义")
+    bg_bytes = 0  # 本地背景图占用的内存（上传文件+base64），供内存管理器统计
     bg_type = st.sidebar.radio("背景类型", ["纯色背景", "本地图片", "在线图片"], index=1)
     
     # 纯色背景（暖色系默认）
@@ -43,6 +50,7 @@ def set_page_background():
         uploaded_bg = st.sidebar.file_uploader("上传校园背景图", type=["png", "jpg", "jpeg"])
         if uploaded_bg:
             bg_base64 = base64.b64encode(uploaded_bg.read()).decode()
+            bg_bytes = uploaded_bg.size + len(bg_base64)
             st.markdown(
                 f"""
                 <style>
@@ -93,18 +101,46 @@ def set_page_background():
                 """,
                 unsafe_allow_html=True
             )
+    return bg_bytes
 
 # 页面配置
 st.set_page_config(page_title="课程表工具", page_icon="🏫", layout="wide")
-set_page_background()
+background_bytes = set_page_background()
 
 # ====================== 核心功能代码（与原功能一致，省略重复部分） ======================
 # 1. 初始化数据
 COURSE_COLUMNS = ["课程名称", "星期", "开始时间", "结束时间", "教室", "任课老师"]
+if "user_id" not in st.session_state:
+    st.session_state.user_id = uuid.uuid4().hex
+
+# 全局提醒引擎：所有会话共享一个实例，按分钟批量计算提醒
+@st.cache_resource
+def get_reminder_engine():
+    return ReminderEngine(window_minutes=15)
+
+reminder_engine = get_reminder_engine()
+
+# 全局内存管理器：两次交互之间课表由它托管，空闲会话的课表会换出到磁盘
+# 换出时一并从提醒引擎移除该会话（引擎中保存着课表副本），重新加载后由下方重新注册；
+# 只有Streamlit确认会话已关闭时才删除换出文件
+@st.cache_resource
+def get_memory_governor():
+    return MemoryGovernor(memory_cap_mb=512, idle_ttl=15 * 60, session_closed=streamlit_session_closed,
+                          on_release=get_reminder_engine().remove_user)
+
+memory_governor = get_memory_governor()
 if "courses" not in st.session_state:
-    st.session_state.courses = pd.DataFrame(columns=COURSE_COLUMNS)
+    courses, search_index = memory_governor.load(st.session_state.user_id, streamlit_session_id())
+    st.session_state.courses = courses if courses is not None else pd.DataFrame(columns=COURSE_COLUMNS)
+    st.session_state.search_index = search_index if search_index is not None else CourseSearchIndex()
+    if search_index is None or "utilization" not in st.session_state:
+        # 派生数据随课表换出被丢弃时，利用率汇总也从头统计
+        st.session_state.utilization = UtilizationRollup()
 
-# 2. 辅助函数（复制版本1的check_conflict/recommend_materials/get_upcoming_courses/validate_course_csv/convert_df_to_csv）
+if not reminder_engine.has_user(st.session_state.user_id):
+    reminder_engine.update_user(st.session_state.user_id, st.session_state.courses)
+
+# 2. 辅助函数（复制版本1的check_conflict/recommend_materials/validate_course_csv/convert_df_to_csv）
 def check_conflict(new_course, existing_courses):
     same_weekday = existing_courses[existing_courses["星期"] == new_course["星期"]]
     if same_weekday.empty:
@@ -127,27 +163,11 @@ def recommend_materials(course_name):
         "数据结构": ["数据结构与算法分析: https://book.douban.com/subject/1139426/", "LeetCode刷题指南: https://leetcode.cn"],
         "高数": ["同济高数教材: https://www.tongji.edu.cn", "高数网课: https://www.bilibili.com/video/BV1YT411g7br"]
     }
-    for keyword, materials in material_map.items():
-        if keyword in course_name:
-            return materials
+    keyword = match_keyword(course_name, material_map)
+    if keyword:
+        return material_map[keyword]
     return ["暂无匹配的学习资料，可自行添加~"]
 
-def get_upcoming_courses(courses):
-    if courses.empty:
-        return []
-    tz = pytz.timezone("Asia/Shanghai")
-    now = datetime.now(tz).time()
-    now_plus_15 = (datetime.combine(datetime.today(), now) + timedelta(minutes=15)).time()
-    upcoming = []
-    weekday_map = {1:"周一", 2:"周二", 3:"周三", 4:"周四", 5:"周五", 6:"周六", 7:"周日"}
-    today_weekday = weekday_map[datetime.now(tz).weekday() + 1]
-    today_courses = courses[courses["星期"] == today_weekday]
-    for _, course in today_courses.iterrows():
-        course_start = datetime.strptime(course["开始时间"], "%H:%M").time()
-        if now <= course_start <= now_plus_15:
-            upcoming.append(course)
-    return upcoming
-
 def validate_course_csv(csv_df):
     if list(csv_df.columns) != COURSE_COLUMNS:
         return False, f"CSV列名不匹配！要求：{COURSE_COLUMNS}"
@@ -205,6 +225,7 @@ with st.sidebar:
             else:
                 new_row = pd.DataFrame([new_course])
                 st.session_state.courses = pd.concat([st.session_state.courses, new_row], ignore_index=True)
+                reminder_engine.update_user(st.session_state.user_id, st.session_state.courses)
                 st.success("✅ 添加成功！")
 
 # 主区域：分栏布局（左：CSV导入+提醒，右：课程表+推荐）
@@ -221,36 +242,64 @@ with col1:
     template_csv = convert_df_to_csv(template_df)
     st.download_button("📥 下载模板", data=template_csv, file_name="校园课程表模板.csv", mime="text/csv")
     
-    uploaded_csv = st.file_uploader("选择CSV文件", type=["csv"])
-    if uploaded_csv is not None:
+    reimport_mode = st.checkbox("🔄 增量重新导入（只处理变化的行）", help="适用于教务处重新发布的课表：新增/修改/删除的行会同步到当前课表，未变化的行不再重复校验")
+    uploaded_csv = st.file_uploader("选择CSV/Excel文件", type=["csv", "xlsx"])
+    if uploaded_csv is not None and reimport_mode and st.session_state.get("reimported_file") == uploaded_csv.file_id:
+        # 同一次上传只增量导入一次：Streamlit会保留已上传的文件，之后每次rerun都会再次执行导入，
+        # 而增量导入以文件为准，重复应用会把之后手动添加的课程删掉
+        st.info("该文件已增量导入，之后手动添加的课程会保留；如需再次导入请重新上传文件~")
+    elif uploaded_csv is not None:
         try:
-            csv_df = pd.read_csv(uploaded_csv, encoding="utf-8-sig")
-            is_valid, result = validate_course_csv(csv_df)
-            if not is_valid:
-                st.error(f"❌ 校验失败：{result}")
+            if uploaded_csv.name.lower().endswith(".xlsx"):
+                # Excel：只读流式解析，表头自动映射到标准列名
+                csv_df = read_course_excel(uploaded_csv, COURSE_COLUMNS)
+            else:
+                csv_df = pd.read_csv(uploaded_csv, encoding="utf-8-sig")
+            if reimport_mode:
+                # 增量重新导入：只校验/冲突检测变化的行，一次性替换课表
+                ok, result = reimport_courses(st.session_state.courses, csv_df, COURSE_COLUMNS, validate_course_csv, check_conflict)
+                if not ok:
+                    st.error(f"❌ 校验失败：{result}")
+                elif len(result["touched"]) or len(result["diff"].removed):
+                    old_rows = len(st.session_state.courses)
+                    st.session_state.courses = result["courses"]
+                    reminder_engine.update_user(st.session_state.user_id, st.session_state.courses)
+                    st.session_state.utilization.apply_diff(old_rows, result["replaced"], result["touched"], len(result["courses"]))
+                    st.success(f"✅ 增量导入：{result['diff'].summary()}")
+                elif not result["conflicts"]:
+                    st.info("😌 课表与文件一致，无需更新")
+                if ok:
+                    st.session_state.reimported_file = uploaded_csv.file_id  # 记住已应用的上传，rerun时不再重复导入
+                    if result["conflicts"]:
+                        st.warning(f"⚠️ 冲突课程未应用：{result['conflicts']}")
             else:
-                conflict_courses = []
-                valid_courses = []
-                for _, row in result.iterrows():
-                    new_course = row.to_dict()
-                    conflict, conflict_name = check_conflict(new_course, st.session_state.courses)
-                    if conflict:
-                        conflict_courses.append(f"{new_course['课程名称']}（与{conflict_name}冲突）")
-                    else:
-                        valid_courses.append(new_course)
-                if conflict_courses:
-                    st.warning(f"⚠️ 冲突课程：{conflict_courses}")
-                if valid_courses:
-                    valid_df = pd.DataFrame(valid_courses)
-                    st.session_state.courses = pd.concat([st.session_state.courses, valid_df], ignore_index=True)
-                    st.success(f"✅ 导入{len(valid_df)}门课程！")
+                is_valid, result = validate_course_csv(csv_df)
+                if not is_valid:
+                    st.error(f"❌ 校验失败：{result}")
+                else:
+                    conflict_courses = []
+                    valid_courses = []
+                    for _, row in result.iterrows():
+                        new_course = row.to_dict()
+                        conflict, conflict_name = check_conflict(new_course, st.session_state.courses)
+                        if conflict:
+                            conflict_courses.append(f"{new_course['课程名称']}（与{conflict_name}冲突）")
+                        else:
+                            valid_courses.append(new_course)
+                    if conflict_courses:
+                        st.warning(f"⚠️ 冲突课程：{conflict_courses}")
+                    if valid_courses:
+                        valid_df = pd.DataFrame(valid_courses)
+                        st.session_state.courses = pd.concat([st.session_state.courses, valid_df], ignore_index=True)
+                        reminder_engine.update_user(st.session_state.user_id, st.session_state.courses)
+                        st.success(f"✅ 导入{len(valid_df)}门课程！")
         
         except Exception as e:
             st.error(f"❌ 读取失败：{str(e)}")
     
     # 近期提醒
     st.subheader("🔔 15分钟内课程提醒")
-    upcoming_courses = get_upcoming_courses(st.session_state.courses)
+    upcoming_courses = reminder_engine.get_upcoming(st.session_state.user_id)
     if upcoming_courses:
         for course in upcoming_courses:
             st.markdown(
@@ -277,6 +326,16 @@ with col2:
             st.dataframe(filtered_courses, use_container_width=True)
         else:
             st.dataframe(st.session_state.courses, use_container_width=True)
+
+        # 课程模糊搜索（课程名称/任课老师/教室，课表变化时只为新出现的取值建索引）
+        st.session_state.search_index.sync(st.session_state.courses)
+        search_query = st.text_input("🔍 搜索课程/老师/教室", placeholder="如：高数、张老师、A101")
+        if search_query:
+            hits = st.session_state.search_index.search(search_query, limit=20)
+            if hits:
+                st.dataframe(st.session_state.courses.loc[[row_id for row_id, _ in hits]], use_container_width=True)
+            else:
+                st.info("没有找到匹配的课程")
         
         # 资料推荐
         st.subheader("📚 学习资料推荐")
@@ -291,4 +350,44 @@ with col2:
     # 清空按钮
     if st.button("🗑️ 清空课程表", type="secondary"):
         st.session_state.courses = pd.DataFrame(columns=COURSE_COLUMNS)
-        st.success("✅ 课程表已清空！")
\ No newline at end of file
+        reminder_engine.update_user(st.session_state.user_id, st.session_state.courses)
+        st.session_state.search_index.clear()
+        st.session_state.utilization.clear()
+        st.success("✅ 课程表已清空！")
+
+    # 教室/教师利用率分析（折叠展示，避免挤占课程表）
+    with st.expander("📊 教室/教师利用率分析"):
+        if not st.session_state.courses.empty:
+            # 汇总表随课表增量更新（只统计新增/变化的行），看板直接读取汇总结果
+            utilization = st.session_state.utilization
+            utilization.sync(st.session_state.courses)
+            peak_hours = utilization.peak_hours()
+            if peak_hours:
+                st.write(f"⏰ 上课最集中的时段：{'、'.join(peak_hours)}")
+            st.write("**最繁忙的教室（每周占用分钟）**")
+            st.bar_chart(utilization.busiest_rooms().set_index("教室")["占用分钟"])
+            st.write("**教师每日授课分钟**")
+            st.dataframe(utilization.teacher_load(), use_container_width=True, hide_index=True)
+            st.write("**各时段占用分钟（小时×星期）**")
+            histogram = utilization.hour_histogram()
+            st.bar_chart(histogram[histogram.sum(axis=1) > 0])
+
+            # 下载汇总结果
+            for label, table, file_name in [
+                ("📥 下载教室利用率", utilization.room_load(), "教室利用率.csv"),
+                ("📥 下载教师授课量", utilization.teacher_load(), "教师授课量.csv"),
+                ("📥 下载时段分布", histogram.reset_index(), "时段分布.csv"),
+            ]:
+                st.download_button(label=label, data=convert_df_to_csv(table), file_name=file_name, mime="text/csv")
+        else:
+            st.info("添加课程后即可查看教室/教师利用率~")
+
+# 内存管理状态：换出/加载次数、常驻内存与上限，便于观察换出策略是否生效
+with st.sidebar.expander("🧠 内存管理状态"):
+    st.json(memory_governor.stats())
+
+# 本次运行结束：课表交还内存管理器托管（空闲会话会被换出到磁盘，下次交互时透明加载）
+# 提醒引擎中的副本随课表换出一起释放；背景图片、利用率汇总不能换出，作为附加占用计入内存上限
+extra_bytes = background_bytes + st.session_state.utilization.memory_bytes()
+memory_governor.store(st.session_state.user_id, st.session_state.pop("courses"), st.session_state.pop("search_index"),
+                      derived_bytes=reminder_engine.user_bytes(st.session_state.user_id), extra_bytes=extra_bytes)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+# ---------------------- 教室/教师利用率分析：可增量维护的汇总表 ----------------------
+# 汇总量都是可加的（占用分钟数之和），因此课表新增行时只累加新行，删除/修改时先减去旧行再加新行，
+# 看板直接读取汇总表，不必每次重新扫描整张课表
+
+WEEKDAYS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+HOURS = np.arange(24)
+
+
+def course_minutes(courses):
+    """
+    向量化解析课表时间：返回DataFrame(教室, 任课老师, weekday, start, end, minutes)
+    星期或时间格式非法的行不参与统计
+    """
+    weekday = courses["星期"].map({name: idx for idx, name in enumerate(WEEKDAYS)})
+    start = pd.to_datetime(courses["开始时间"], format="%H:%M", errors="coerce")
+    end = pd.to_datetime(courses["结束时间"], format="%H:%M", errors="coerce")
+    valid = (weekday.notna() & start.notna() & end.notna()).to_numpy()
+    parsed = pd.DataFrame({
+        "教室": courses["教室"].astype(str).to_numpy()[valid],
+        "任课老师": courses["任课老师"].astype(str).to_numpy()[valid],
+        "weekday": weekday.to_numpy()[valid].astype("int64"),
+        "start": (start.dt.hour * 60 + start.dt.minute).to_numpy()[valid].astype("int64"),
+        "end": (end.dt.hour * 60 + end.dt.minute).to_numpy()[valid].astype("int64"),
+    })
+    parsed["minutes"] = (parsed["end"] - parsed["start"]).clip(lower=0)
+    return parsed
+
+
+def resource_weekday_minutes(parsed, resource):
+    # 某类资源（教室/老师）每天的占用分钟数：行=资源，列=星期
+    table = parsed.groupby([resource, "weekday"])["minutes"].sum().unstack(fill_value=0)
+    table = table.reindex(columns=range(len(WEEKDAYS)), fill_value=0)
+    table.columns = WEEKDAYS
+    return table.astype("int64")
+
+
+def hour_slot_minutes(parsed):
+    # 每个星期×小时段内被占用的课程分钟数（课程跨多个小时段时按实际重叠分摊）
+    slot_start = HOURS * 60
+    overlap = np.minimum(parsed["end"].to_numpy()[:, None], slot_start + 60) - \
+        np.maximum(parsed["start"].to_numpy()[:, None], slot_start)
+    matrix = np.zeros((len(WEEKDAYS), len(HOURS)), dtype="int64")
+    np.add.at(matrix, parsed["weekday"].to_numpy(), np.clip(overlap, 0, None))
+    return matrix
+
+
+class UtilizationRollup:
+    """
+    利用率汇总（每个会话一份，跟随课表增量更新）
+    - sync(courses)：课表只追加时只统计新增行；行数减少（清空）时整体重算
+    - apply_diff(...)：增量重新导入后减去被替换的旧行、加上新写入的行
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.room_minutes = pd.DataFrame(columns=WEEKDAYS, dtype="int64")
+        self.teacher_minutes = pd.DataFrame(columns=WEEKDAYS, dtype="int64")
+        self.hour_minutes = np.zeros((len(WEEKDAYS), len(HOURS)), dtype="int64")
+        self._synced_rows = 0
+
+    def _accumulate(self, rows, sign):
+        if rows.empty:
+            return
+        parsed = course_minutes(rows)
+        for attr, resource in (("room_minutes", "教室"), ("teacher_minutes", "任课老师")):
+            merged = getattr(self, attr).add(sign * resource_weekday_minutes(parsed, resource), fill_value=0)
+            # 占用减到0的资源（如整门课被删除）从汇总中移除
+            setattr(self, attr, merged[merged.sum(axis=1) > 0].astype("int64"))
+        self.hour_minutes += sign * hour_slot_minutes(parsed)
+
+    def sync(self, courses):
+        if len(courses) < self._synced_rows:
+            self.clear()
+        if len(courses) == self._synced_rows:
+            return
+        self._accumulate(courses.iloc[self._synced_rows:], 1)
+        self._synced_rows = len(courses)
+
+    def apply_diff(self, old_rows, replaced, touched, new_rows):
+        """
+        增量重新导入后更新汇总：replaced为被删除/被覆盖的旧行，touched为新写入的行
+        汇总尚未与旧课表同步时直接清空，等下次sync整体重算
+        """
+        if self._synced_rows != old_rows:
+            self.clear()
+            return
+        self._accumulate(replaced, -1)
+        self._accumulate(touched, 1)
+        self._synced_rows = new_rows
+
+    def memory_bytes(self):
+        return int(self.room_minutes.memory_usage(deep=True).sum() + self.teacher_minutes.memory_usage(deep=True).sum()
+                   + self.hour_minutes.nbytes)
+
+    # ---------- 报表（均基于汇总表计算，与课表行数无关） ----------
+    def busiest_rooms(self, top=10):
+        total = self.room_minutes.sum(axis=1).sort_values(ascending=False).head(top)
+        return pd.DataFrame({"教室": total.index, "占用分钟": total.to_numpy(), "占用小时": (total / 60).round(1).to_numpy()})
+
+    def teacher_load(self):
+        load = self.teacher_minutes.copy()
+        load["合计"] = load.sum(axis=1)
+        load = load.sort_values("合计", ascending=False)
+        load.index.name = "任课老师"
+        return load.reset_index()
+
+    def room_load(self):
+        load = self.room_minutes.copy()
+        load["合计"] = load.sum(axis=1)
+        load = load.sort_values("合计", ascending=False)
+        load.index.name = "教室"
+        return load.reset_index()
+
+    def hour_histogram(self):
+        histogram = pd.DataFrame(self.hour_minutes.T, columns=WEEKDAYS)
+        histogram.index = [f"{hour:02d}:00" for hour in HOURS]
+        histogram.index.name = "时段"
+        return histogram
+
+    def peak_hours(self, top=3):
+        total = self.hour_histogram().sum(axis=1)
+        total = total[total > 0].sort_values(ascending=False).head(top)
+        return list(total.index)
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+# ---------------------- 增量重新导入：按行指纹计算差异 ----------------------
+# 教务处重新发布课表时通常只改动少量行：按稳定键+内容哈希算出新增/删除/修改的行，
+# 只对差异行做格式校验和冲突检测，最后一次性替换课表（中途失败不会留下半导入状态）
+
+# 稳定键：同一门课在同一天同一开始时间视为同一行（键相同、内容不同 => 修改）
+KEY_COLUMNS = ["课程名称", "星期", "开始时间"]
+# 哈希混合常数（64位黄金分割数）：合并多列哈希、区分重复键的出现次序
+_OCCURRENCE_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _column_hashes(frame, columns):
+    # 每列只哈希一次，稳定键与整行内容共用；统一转为字符串，避免CSV读入的数字/字符串类型差异导致误判为修改
+    return {col: pd.util.hash_array(frame[col].astype(str).to_numpy(dtype=object)) for col in columns}
+
+
+def _combine(hashes):
+    combined = np.zeros(len(hashes[0]), dtype="uint64")
+    with np.errstate(over="ignore"):
+        for column_hash in hashes:
+            combined = combined * _OCCURRENCE_MIX + column_hash
+    return combined
+
+
+def fingerprint(courses, columns):
+    """
+    计算每行的指纹：返回DataFrame(key, content)，索引与courses一致
+    key = 稳定键哈希（重复键按出现次序区分），content = 整行内容哈希
+    """
+    if courses.empty:
+        return pd.DataFrame({"key": pd.Series(dtype="uint64"), "content": pd.Series(dtype="uint64")})
+    hashes = _column_hashes(courses, columns)
+    key_hash = _combine([hashes[col] for col in KEY_COLUMNS])
+    occurrence = pd.Series(key_hash).groupby(key_hash).cumcount().to_numpy().astype("uint64")
+    with np.errstate(over="ignore"):
+        key = key_hash + occurrence * _OCCURRENCE_MIX
+    return pd.DataFrame({"key": key, "content": _combine([hashes[col] for col in columns])}, index=courses.index)
+
+
+class CourseDiff:
+    """
+    当前课表与新文件之间的差异
+    added：新文件中新增的行；removed：当前课表中需删除的行标签；
+    changed：键相同但内容变化的行（索引为当前课表中的行标签，值为新内容）
+    """
+
+    def __init__(self, added, removed, changed, unchanged):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.unchanged = unchanged
+
+    @property
+    def is_empty(self):
+        return self.added.empty and self.changed.empty and len(self.removed) == 0
+
+    def summary(self):
+        return f"新增{len(self.added)}门，修改{len(self.changed)}门，删除{len(self.removed)}门，未变化{self.unchanged}门"
+
+
+def diff_courses(current, incoming, columns):
+    """
+    计算incoming相对current的差异（全部向量化，不逐行比较）
+    """
+    old = fingerprint(current, columns)
+    new = fingerprint(incoming, columns)
+    old_by_key = pd.Series(old.index, index=old["key"].to_numpy())
+    new_in_old = new["key"].isin(old["key"]).to_numpy()
+    old_in_new = old["key"].isin(new["key"]).to_numpy()
+
+    # 键相同：比较内容哈希
+    matched = new[new_in_old]
+    matched_old_labels = old_by_key.loc[matched["key"].to_numpy()].to_numpy()
+    content_changed = matched["content"].to_numpy() != old.loc[matched_old_labels, "content"].to_numpy()
+
+    changed = incoming.loc[matched.index[content_changed], columns].copy()
+    changed.index = pd.Index(matched_old_labels[content_changed])
+    return CourseDiff(
+        added=incoming.loc[new.index[~new_in_old], columns],
+        removed=old.index[~old_in_new],
+        changed=changed,
+        unchanged=int((~content_changed).sum()),
+    )
+
+
+def _to_minutes(series):
+    parsed = pd.to_datetime(series, format="%H:%M", errors="coerce")
+    return (parsed.dt.hour * 60 + parsed.dt.minute).to_numpy()
+
+
+def _align_dtypes(current, incoming, columns):
+    # 同一列在旧课表与新文件中类型不同时（如CSV读入的教室为int、Excel/手动添加为str）统一转为字符串，与指纹哈希的口径一致
+    mismatched = {col: str for col in columns if current[col].dtype != incoming[col].dtype}
+    if not mismatched:
+        return current, incoming
+    return current.astype(mismatched), incoming.astype(mismatched)
+
+
+def reimport_courses(current, incoming, columns, validate, check_conflict):
+    """
+    增量重新导入：只校验、只冲突检测差异行，然后一次性生成新课表
+    validate / check_conflict 为页面中已有的校验函数和冲突检测函数
+    返回：(是否成功, 错误信息/结果字典)
+    结果字典：courses 新课表；diff 实际应用的差异；conflicts 因冲突未应用的行；
+             touched 新写入的行（索引为新标签）；
+             replaced 被删除或被覆盖的旧行（索引为旧标签）
+    """
+    if list(incoming.columns) != columns:
+        return False, f"CSV列名不匹配！要求列名：{columns}，实际列名：{list(incoming.columns)}"
+    current, incoming = _align_dtypes(current, incoming, columns)
+    diff = diff_courses(current, incoming, columns)
+    delta = pd.concat([diff.changed, diff.added])
+    if not delta.empty:
+        is_valid, result = validate(delta.reset_index(drop=True))
+        if not is_valid:
+            return False, result
+
+    # 改了开始时间的课程会拆成“删除旧行+新增新行”：按课程名称+星期配对，新行被拒绝时旧行保留
+    removed_by_course = {}
+    for label, name, weekday in zip(diff.removed, current.loc[diff.removed, "课程名称"], current.loc[diff.removed, "星期"]):
+        removed_by_course.setdefault((name, weekday), []).append(label)
+    checks = [(label, course) for label, course in zip(diff.changed.index, diff.changed.to_dict("records"))]
+    checks += [(None, course) for course in diff.added.to_dict("records")]
+
+    # 冲突检测的基准：去掉被删除/被修改的旧行；先向量化筛出时间重叠的候选，再交给check_conflict
+    # 保留下来的旧行可能又与其他新行冲突，因此重复检测直到保留集合不再变化（每轮只增不减）
+    restored = set()
+    while True:
+        base = current.drop(index=diff.removed.difference(list(restored)).union(diff.changed.index))
+        base_start = _to_minutes(base["开始时间"])
+        base_end = _to_minutes(base["结束时间"])
+        conflicts = []
+        accepted_changed = []
+        accepted_added = []
+        pending = {key: list(labels) for key, labels in removed_by_course.items()}
+        keep_old = set()
+        for label, course in checks:
+            start, end = _to_minutes(pd.Series([course["开始时间"], course["结束时间"]]))
+            candidates = base[(base["星期"].to_numpy() == course["星期"]) & (base_start < end) & (base_end > start)]
+            conflict, conflict_name = check_conflict(course, candidates)
+            if conflict:
+                paired = pending.get((course["课程名称"], course["星期"]))
+                if label is None and paired:
+                    keep_old.add(paired.pop(0))
+                    conflicts.append(f"{course['课程名称']}（与{conflict_name}时间冲突，保留原时间）")
+                else:
+                    conflicts.append(f"{course['课程名称']}（与{conflict_name}时间冲突）")
+            elif label is None:
+                accepted_added.append(course)
+            else:
+                accepted_changed.append((label, course))
+        if keep_old <= restored:
+            break
+        restored |= keep_old
+    removed = diff.removed.difference(list(restored))
+
+    # 一次性生成新课表：保留行顺序不变，修改行原位替换，新增行追加到末尾
+    # 用concat拼接而不是.loc原位赋值：原位赋值要求新值与列类型严格一致
+    kept = current.drop(index=removed)
+    if accepted_changed:
+        changed_df = pd.DataFrame([course for _, course in accepted_changed],
+                                  index=[label for label, _ in accepted_changed], columns=columns)
+        kept = pd.concat([kept.drop(index=changed_df.index), changed_df]).loc[kept.index]
+    added_df = pd.DataFrame(accepted_added, columns=columns)
+    new_courses = pd.concat([kept, added_df], ignore_index=True)
+
+    label_map = pd.Series(np.arange(len(kept)), index=kept.index)
+    touched_labels = list(label_map.loc[[label for label, _ in accepted_changed]]) + \
+        list(range(len(kept), len(new_courses)))
+    # 返回实际应用的差异：因冲突未应用的新增/修改，以及因此保留的旧行都不计入
+    applied = CourseDiff(
+        added=added_df,
+        removed=removed,
+        changed=kept.loc[[label for label, _ in accepted_changed], columns],
+        unchanged=diff.unchanged,
+    )
+    return True, {
+        "courses": new_courses,
+        "diff": applied,
+        "conflicts": conflicts,
+        "touched": new_courses.loc[touched_labels],
+        "replaced": current.loc[removed.append(pd.Index([label for label, _ in accepted_changed]))],
+    }
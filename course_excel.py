@@ -0,0 +1,175 @@
+import re
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+
+try:
+    # 可选依赖：安装openpyxl后支持直接导入Excel(.xlsx)课程表
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+# ---------------------- Excel课程表导入：只读流式解析 ----------------------
+# 以read_only模式逐行读取工作表（不加载整个工作簿的单元格对象），只保留课程表需要的6列，
+# 表头别名自动映射到标准列名，时间单元格直接换算为分钟，最后统一成与CSV一致的DataFrame
+
+# 标准列名 -> 常见表头写法（比较前统一去空白、转小写、去掉括号里的说明）
+# 不收录name/day/start这类泛化英文表头，避免误认其他表格中的同名列
+HEADER_ALIASES = {
+    "课程名称": ["课程名称", "课程", "课程名", "科目", "科目名称", "course", "coursename"],
+    "星期": ["星期", "星期几", "上课星期", "上课日", "周几", "weekday"],
+    "开始时间": ["开始时间", "起始时间", "开始", "starttime"],
+    "结束时间": ["结束时间", "下课时间", "终止时间", "结束", "endtime"],
+    "教室": ["教室", "上课教室", "上课地点", "地点", "教室名称", "room", "classroom", "location"],
+    "任课老师": ["任课老师", "任课教师", "授课老师", "授课教师", "教师", "老师", "teacher", "instructor"],
+}
+TIME_COLUMNS = ["开始时间", "结束时间"]
+# 一列同时写起止时间（如“08:00-09:40”）的表头：没有单独的开始/结束时间列时拆分为两列
+TIME_RANGE = "上课时间"
+TIME_RANGE_ALIASES = ["上课时间", "时间段", "上课时段", "起止时间"]
+TIME_RANGE_SEPARATOR = re.compile(r"\s*[-~～—–至到]+\s*")
+WEEKDAYS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+# 表头最多出现在前几行（教务导出的表格上方常有标题、学期等说明行）
+HEADER_SCAN_ROWS = 20
+
+
+def normalize_header(value):
+    text = re.sub(r"[（(].*?[)）]", "", str(value))
+    return "".join(text.lower().split())
+
+
+_ALIAS_LOOKUP = {normalize_header(alias): column for column, aliases in HEADER_ALIASES.items() for alias in aliases}
+_ALIAS_LOOKUP.update({normalize_header(alias): TIME_RANGE for alias in TIME_RANGE_ALIASES})
+
+
+def map_header(row):
+    """
+    把一行表头映射为 {标准列名: 列序号}（起止时间列记为TIME_RANGE）；同一标准列出现多次时取第一列
+    """
+    mapping = {}
+    for position, value in enumerate(row):
+        if value is None:
+            continue
+        column = _ALIAS_LOOKUP.get(normalize_header(value))
+        if column is not None and column not in mapping:
+            mapping[column] = position
+    return mapping
+
+
+def header_complete(mapping, columns):
+    # 所有标准列都找到，或者只缺开始/结束时间但有起止时间列
+    missing = [column for column in columns if column not in mapping]
+    return not missing or (TIME_RANGE in mapping and set(missing) <= set(TIME_COLUMNS))
+
+
+def split_time_range(value):
+    """
+    起止时间单元格 -> (开始, 结束)：按“-”“~”“至”等分隔符拆成两段
+    只有一个时间时结束时间留空；拆不成两段时原文同时作为开始和结束，交给格式校验报错
+    """
+    if value is None:
+        return None, None
+    parts = TIME_RANGE_SEPARATOR.split(str(value).strip())
+    if len(parts) == 1:
+        return value, None
+    if len(parts) == 2 and all(parts):
+        return parts[0], parts[1]
+    return value, value
+
+
+def cell_minutes(value):
+    """
+    Excel时间单元格 -> 当天分钟数；无法识别时返回None（字符串原样保留，交给格式校验报错）
+    openpyxl按单元格格式返回time/datetime/timedelta，未设格式的时间是“天的小数”
+    """
+    if isinstance(value, (time, datetime)):
+        return value.hour * 60 + value.minute
+    if isinstance(value, timedelta):
+        minutes = int(value.total_seconds() // 60)
+        return minutes if 0 <= minutes < 24 * 60 else None
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and 0 <= value < 1:
+        return int(round(value * 24 * 60)) % (24 * 60)
+    return None
+
+
+def cell_weekday(value):
+    # 数字1-7、“星期一”“礼拜天”等写法统一为“周X”
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and float(value).is_integer() and 1 <= value <= 7:
+        return WEEKDAYS[int(value) - 1]
+    text = re.sub(r"^(星期|礼拜)", "周", str(value).strip())
+    return "周日" if text == "周天" else text
+
+
+def cell_text(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # 教室号等纯数字单元格避免显示为“101.0”
+    return str(value).strip()
+
+
+def _format_times(values):
+    # 分钟数统一格式化为HH:MM（只做一次向量化格式化，不经过字符串解析）；原样保留的字符串不处理
+    minutes = pd.Series([cell_minutes(value) for value in values], dtype="float64")
+    known = minutes.notna().to_numpy()
+    formatted = np.array([None if value is None else cell_text(value) for value in values], dtype=object)
+    if known.any():
+        whole = minutes[known].astype("int64")
+        formatted[known] = ((whole // 60).astype(str).str.zfill(2) + ":" + (whole % 60).astype(str).str.zfill(2)).to_numpy()
+    return formatted
+
+
+def _read_sheet(worksheet, columns):
+    rows = worksheet.iter_rows(values_only=True)
+    mapping = None
+    for _, row in zip(range(HEADER_SCAN_ROWS), rows):
+        candidate = map_header(row)
+        if header_complete(candidate, columns):
+            mapping = candidate
+            break
+    if mapping is None:
+        return None
+
+    # 继续消费同一个行迭代器：只取需要的列，整行为空的跳过；缺少的开始/结束时间从起止时间列拆分
+    split = [column for column in columns if column not in mapping]
+    picked_columns = [column for column in columns if column in mapping] + ([TIME_RANGE] if split else [])
+    positions = [mapping[column] for column in picked_columns]
+    values = {column: [] for column in columns}
+    for row in rows:
+        picked = [row[position] if position < len(row) else None for position in positions]
+        if all(value is None or str(value).strip() == "" for value in picked):
+            continue
+        for column, value in zip(picked_columns, picked):
+            if column == TIME_RANGE:
+                for time_column, part in zip(TIME_COLUMNS, split_time_range(value)):
+                    if time_column in split:
+                        values[time_column].append(part)
+            else:
+                values[column].append(value)
+
+    data = {}
+    for column in columns:
+        if column in TIME_COLUMNS:
+            data[column] = _format_times(values[column])
+        elif column == "星期":
+            data[column] = [None if value is None else cell_weekday(value) for value in values[column]]
+        else:
+            data[column] = [None if value is None else cell_text(value) for value in values[column]]
+    return pd.DataFrame(data, columns=columns)
+
+
+def read_course_excel(file, columns):
+    """
+    读取Excel课程表：依次扫描各工作表，识别出表头的工作表全部导入（说明页等无表头的工作表自动跳过）
+    返回列名与columns一致的DataFrame，之后与CSV走同一套校验和冲突检测；无法识别时抛出ValueError
+    """
+    if openpyxl is None:
+        raise ValueError("导入Excel需要安装openpyxl（pip install openpyxl），也可以另存为CSV后导入")
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheets = [frame for frame in (_read_sheet(worksheet, columns) for worksheet in workbook.worksheets)
+                  if frame is not None]
+    finally:
+        workbook.close()
+    if not sheets:
+        raise ValueError(f"未在Excel中找到课程表表头，要求包含列：{columns}（开始/结束时间也可以合并为一列“上课时间”，如08:00-09:40）")
+    return pd.concat(sheets, ignore_index=True)
@@ -0,0 +1,319 @@
+import re
+import sys
+import weakref
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+try:
+    # 可选依赖：安装pypinyin后支持拼音首字母检索（如“gs”命中“高数”）
+    from pypinyin import Style, lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+# ---------------------- 课程模糊检索：n-gram倒排索引 ----------------------
+# 以单字+相邻双字为检索单元（中文无需分词），双字命中权重更高
+
+# 参与检索的字段及权重：课程名称最重要，其次老师、教室
+SEARCH_FIELDS = {"课程名称": 3, "任课老师": 2, "教室": 1}
+
+
+def text_grams(text, pinyin=False):
+    """
+    把文本切分为n-gram集合：单字 + 相邻双字（忽略大小写和空白）
+    pinyin=True且安装了pypinyin时，额外加入拼音首字母的n-gram
+    """
+    text = "".join(str(text).lower().split())
+    variants = [text]
+    if pinyin and lazy_pinyin is not None:
+        initials = "".join(lazy_pinyin(text, style=Style.FIRST_LETTER))
+        if initials != text:
+            variants.append(initials)
+    grams = set()
+    for variant in variants:
+        grams.update(variant)
+        grams.update(variant[i:i + 2] for i in range(len(variant) - 1))
+    return grams
+
+
+def gram_weight(gram):
+    return 2 if len(gram) > 1 else 1
+
+
+def normalize_text(text):
+    return "".join(str(text).lower().split())
+
+
+# 内存估算常数（CPython实测）：倒排条目=int32槽位+float32权重（含数组预留）；
+# gram=键字符串+字典项+元组和两个数组；文档=槽位字典项+各列表指针+整数对象
+_ENTRY_BYTES = 9
+_GRAM_BYTES = 300
+_DOC_BYTES = 200
+
+
+def _texts_bytes(texts):
+    return sys.getsizeof(texts) + sum(sys.getsizeof(text) for text in texts)
+
+
+class NgramIndex:
+    """
+    通用n-gram倒排索引：gram -> (文档槽位数组, 字段权重数组)
+    文档按添加顺序编号为连续槽位，检索时用numpy对倒排表做bincount累加得分
+    """
+
+    def __init__(self, pinyin=False):
+        self.pinyin = pinyin
+        self._postings = defaultdict(lambda: (array("i"), array("f")))  # gram -> (槽位数组, 权重数组)
+        self._arrays = {}      # gram -> 倒排表的numpy缓存（追加后失效）
+        self._slots = {}       # doc_id -> 槽位
+        self._doc_ids = []     # 槽位 -> doc_id
+        self._doc_texts = []   # 槽位 -> 规范化（小写去空白）原文列表
+        self._doc_totals = []  # 槽位 -> 文档双字gram加权总数（反向覆盖率使用）
+        self._entries = 0      # 倒排表条目总数（内存估算使用）
+        self._text_bytes = 0   # 原文列表占用
+        self._array_bytes = 0  # numpy缓存占用
+
+    def __len__(self):
+        return len(self._slots)
+
+    def add(self, doc_id, fields):
+        """
+        添加一个文档，返回其槽位；fields为[(文本, 权重), ...]；已存在的doc_id直接返回原槽位
+        """
+        if doc_id in self._slots:
+            return self._slots[doc_id]
+        slot = len(self._doc_ids)
+        gram_weights = {}
+        for text, weight in fields:
+            for gram in text_grams(text, self.pinyin):
+                if gram_weights.get(gram, 0) < weight:
+                    gram_weights[gram] = weight
+        for gram, weight in gram_weights.items():
+            slots, weights = self._postings[gram]
+            slots.append(slot)
+            weights.append(weight)
+            self._drop_array(gram)
+        self._entries += len(gram_weights)
+        self._slots[doc_id] = slot
+        self._doc_ids.append(doc_id)
+        self._doc_texts.append([normalize_text(text) for text, _ in fields])
+        self._text_bytes += _texts_bytes(self._doc_texts[-1])
+        self._doc_totals.append(sum(gram_weight(gram) * weight for gram, weight in gram_weights.items() if len(gram) > 1))
+        return slot
+
+    def add_texts(self, texts):
+        """
+        批量添加单字段文档（doc_id即文本本身，权重1），已存在的跳过；返回 {文本: 槽位}
+        所有gram一次性展开后用pd.factorize分组，每个gram的倒排表只追加一次（比逐个add快数倍）
+        """
+        slots = {}
+        new = []
+        for text in dict.fromkeys(texts):
+            if text in self._slots:
+                slots[text] = self._slots[text]
+            else:
+                slots[text] = len(self._doc_ids) + len(new)
+                new.append(text)
+        if not new:
+            return slots
+        doc_grams = [text_grams(text, self.pinyin) for text in new]
+        counts = np.fromiter(map(len, doc_grams), dtype=np.int64, count=len(new))
+        codes, grams = pd.factorize(np.array([gram for item in doc_grams for gram in item], dtype=object))
+        doc_slots = np.repeat(np.arange(len(self._doc_ids), len(self._doc_ids) + len(new)), counts)
+        order = np.argsort(codes, kind="stable")
+        for gram, gram_slots in zip(grams, np.split(doc_slots[order], np.cumsum(np.bincount(codes))[:-1])):
+            posting_slots, posting_weights = self._postings[gram]
+            posting_slots.frombytes(gram_slots.astype(np.int32).tobytes())
+            posting_weights.frombytes(np.ones(len(gram_slots), dtype=np.float32).tobytes())
+            self._drop_array(gram)
+        is_bigram = np.array([len(gram) > 1 for gram in grams])
+        totals = np.bincount(doc_slots - len(self._doc_ids), weights=2 * is_bigram[codes], minlength=len(new))
+        self._entries += len(codes)
+        self._slots.update(zip(new, range(len(self._doc_ids), len(self._doc_ids) + len(new))))
+        self._doc_ids.extend(new)
+        self._doc_texts.extend([normalize_text(text)] for text in new)
+        self._text_bytes += sum(_texts_bytes([text]) for text in new)
+        self._doc_totals.extend(totals.tolist())
+        return slots
+
+    def clear(self):
+        self._postings.clear()
+        self._arrays.clear()
+        self._slots.clear()
+        self._doc_ids.clear()
+        self._doc_texts.clear()
+        self._doc_totals.clear()
+        self._entries = self._text_bytes = self._array_bytes = 0
+
+    def memory_bytes(self):
+        """
+        估算索引占用的内存（字节）：按计数器计算，O(1)，可在每次脚本运行结束时调用
+        """
+        return (self._entries * _ENTRY_BYTES + len(self._postings) * _GRAM_BYTES
+                + len(self._doc_ids) * _DOC_BYTES + self._text_bytes + self._array_bytes)
+
+    def _posting_arrays(self, gram):
+        if gram not in self._arrays:
+            slots, weights = self._postings[gram]
+            self._arrays[gram] = (np.array(slots, dtype=np.int64), np.array(weights, dtype=np.float64))
+            self._array_bytes += self._arrays[gram][0].nbytes + self._arrays[gram][1].nbytes
+        return self._arrays[gram]
+
+    def _drop_array(self, gram):
+        cached = self._arrays.pop(gram, None)
+        if cached is not None:
+            self._array_bytes -= cached[0].nbytes + cached[1].nbytes
+
+    def hit_scores(self, grams):
+        """
+        对查询gram的倒排表做加权bincount，返回每个槽位的命中得分数组
+        """
+        scores = np.zeros(len(self._doc_ids))
+        for gram in grams:
+            if gram not in self._postings:
+                continue
+            slots, weights = self._posting_arrays(gram)
+            scores += np.bincount(slots, weights * gram_weight(gram), minlength=len(scores))
+        return scores
+
+    def best_cover(self, text, min_cover=0.75):
+        """
+        反向匹配：找出被text覆盖比例最高的文档（用于课程名称匹配资料关键词）
+        覆盖率 = 文档双字gram中出现在text里的加权比例；单字不参与（零散单字很容易凑出覆盖率，
+        如“高级数据库”含“高”“数”）；没有双字的文档不参与；低于min_cover时返回None
+        """
+        if not self._slots:
+            return None
+        hits = self.hit_scores({gram for gram in text_grams(text) if len(gram) > 1})
+        totals = np.asarray(self._doc_totals, dtype=np.float64)
+        cover = np.where(totals > 0, hits / np.maximum(totals, 1), 0)
+        best = int(np.argmax(cover))
+        return self._doc_ids[best] if cover[best] >= min_cover else None
+
+
+class CourseSearchIndex:
+    """
+    课程表检索索引：只对各字段的“不同取值”建n-gram索引（教室、老师、课程名重复率很高），
+    每行用整数编码指向取值，检索时把取值得分按编码广播到行（全部向量化），10万行单次检索几十毫秒
+    sync(courses)：课表对象变化时只为新出现的取值建索引，行编码整体向量化重算，无需逐行重建
+    """
+
+    def __init__(self, pinyin=True):
+        self._values = NgramIndex(pinyin=pinyin)
+        self.clear()
+
+    def __len__(self):
+        return len(self._labels)
+
+    def clear(self):
+        self._values.clear()
+        self._value_lengths = []  # 槽位 -> 规范化取值长度（排序时短的优先）
+        self._codes = {field: np.empty(0, dtype=np.int32) for field in SEARCH_FIELDS}
+        self._labels = pd.Index([])
+        self._source = None       # 最近一次同步的课表（弱引用，不延长课表生命周期）
+
+    def sync(self, courses):
+        """
+        让索引与课表保持一致（课表对象未变化时直接返回）
+        """
+        if self._source is not None and self._source() is courses:
+            return
+        # 历史取值只增不减：无用取值超过当前课表可能用到的取值数（多次重新导入后）时整体重建，重建开销被摊薄
+        if len(self._values) > 2 * len(SEARCH_FIELDS) * len(courses) + 1024:
+            self.clear()
+        for field in SEARCH_FIELDS:
+            codes, values = pd.factorize(courses[field].astype(str))
+            values = values.tolist()
+            known = len(self._values)
+            slots = self._values.add_texts(values)
+            self._value_lengths.extend(len(text[0]) for text in self._values._doc_texts[known:])
+            self._codes[field] = np.fromiter((slots[value] for value in values), dtype=np.int32, count=len(values))[codes]
+        self._labels = courses.index
+        self._source = weakref.ref(courses)
+
+    def memory_bytes(self):
+        return (self._values.memory_bytes() + sum(codes.nbytes for codes in self._codes.values())
+                + len(self._value_lengths) * 8 + self._labels.memory_usage())
+
+    def search(self, query, limit=20):
+        """
+        检索：返回[(行标签, 得分), ...]，按 得分降序 → 命中字段长度升序 → 行顺序 排列（结果确定）
+        得分 = 加权n-gram命中率 + 字段包含查询串+1 + 字段与查询串完全相等再+1
+        """
+        needle = normalize_text(query)
+        query_grams = text_grams(query)
+        if not query_grams or not len(self._labels):
+            return []
+        total = sum(gram_weight(gram) for gram in query_grams) * max(SEARCH_FIELDS.values())
+        value_hits = self._values.hit_scores(query_grams)
+        # 取值级别判断包含/相等（只检查有命中的取值）；命中字段长度用于同分时短的优先
+        contains = np.zeros(len(value_hits), dtype=bool)
+        equals = np.zeros(len(value_hits), dtype=bool)
+        for slot in np.flatnonzero(value_hits):
+            text = self._values._doc_texts[slot][0]
+            contains[slot] = needle in text
+            equals[slot] = needle == text
+        lengths = np.asarray(self._value_lengths, dtype=np.int64)
+
+        scores = np.zeros(len(self._labels))
+        row_contains = np.zeros(len(self._labels), dtype=bool)
+        row_equals = np.zeros(len(self._labels), dtype=bool)
+        matched_length = np.full(len(self._labels), np.iinfo(np.int64).max)
+        for field, weight in SEARCH_FIELDS.items():
+            codes = self._codes[field]
+            scores += weight * value_hits[codes]
+            row_contains |= contains[codes]
+            row_equals |= equals[codes]
+            matched_length = np.minimum(matched_length, np.where(value_hits[codes] > 0, lengths[codes], matched_length))
+        scores = scores / total + row_contains + row_equals
+
+        candidates = np.flatnonzero(scores > 0)
+        order = np.lexsort((candidates, matched_length[candidates], -scores[candidates]))[:limit]
+        return [(self._labels[row], round(float(scores[row]), 4)) for row in candidates[order]]
+
+
+# 课程名称末尾的修饰（A/B、Ⅱ、2、（上）等，匹配前已转小写）不参与缩写匹配
+_NAME_SUFFIX = re.compile(r"(?:[\da-zⅰ-ⅻ]|[（(][^（()）]*[)）])+$")
+
+
+def is_abbreviation(keyword, course_name):
+    """
+    判断keyword是否为课程名的“双字词取首字”缩写：高数=高等数学、数电=数字电路
+    课程名（去掉末尾修饰）必须恰好由len(keyword)个双字词组成，因此“高级数据库”不会匹配“高数”
+    """
+    keyword = normalize_text(keyword)
+    core = _NAME_SUFFIX.sub("", normalize_text(course_name))
+    return len(keyword) >= 2 and len(core) == 2 * len(keyword) and core[::2] == keyword
+
+
+@lru_cache(maxsize=16)
+def keyword_index(keywords):
+    """
+    资料关键词索引：按关键词元组缓存，同一组关键词只建一次
+    """
+    index = NgramIndex()
+    for keyword in keywords:
+        index.add(keyword, [(keyword, 1)])
+    return index
+
+
+def match_keyword(course_name, keywords, min_cover=0.75):
+    """
+    课程名称匹配资料关键词，依次尝试：
+    1) 子串精确匹配（忽略大小写和空白，如“python程序设计”匹配“Python”）
+    2) 缩写匹配（如“高等数学”“高等数学A”匹配“高数”）
+    3) 按双字覆盖率模糊匹配（容忍较长关键词中个别字不同）
+    返回命中的关键词，未命中返回None
+    """
+    keywords = tuple(keywords)
+    name = normalize_text(course_name)
+    for keyword in keywords:
+        if normalize_text(keyword) in name:
+            return keyword
+    for keyword in keywords:
+        if is_abbreviation(keyword, course_name):
+            return keyword
+    return keyword_index(keywords).best_cover(course_name, min_cover)
@@ -0,0 +1,420 @@
+"""
+课程表应用并发压测工具：启动一个真实的 `streamlit run` 服务进程，
+用脚本化的本地客户端（websocket + protobuf，与浏览器前端相同的协议）模拟N个并发会话
+
+每个会话按动作配比随机执行：CSV导入、手动添加、筛选、背景切换、课程搜索；
+统计每档并发下的rerun延迟分位数、吞吐量以及服务进程内存(RSS)，并列出各类动作实际执行/跳过的次数
+
+用法示例：
+    python load_test.py --app 1.py --concurrency 1,5,10,20 --actions 30
+    python load_test.py --app 2.py --app 3.py --concurrency 1,10,50 --output 压测结果.csv
+
+说明：协议细节（控件状态字段等）以当前安装的Streamlit版本为准；服务以关闭XSRF的方式启动
+（与.devcontainer中的启动参数一致），以便客户端直接上传文件
+依赖：除streamlit外还需要websockets（pip install websockets），.devcontainer已一并安装
+"""
+import argparse
+import csv
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    from websockets.sync.client import connect
+except ImportError:
+    sys.exit("压测工具需要websockets：pip install websockets")
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.Common_pb2 import FileURLsRequest
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+WEEKDAYS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+COURSE_NAMES = ["Python程序设计", "人工智能导论", "高等数学", "数据结构", "大学英语", "线性代数", "计算机网络"]
+TEACHERS = ["张老师", "李老师", "王老师", "赵老师", "刘老师"]
+
+# 默认动作配比：CSV导入、手动添加、筛选（星期筛选，页面没有时改为切换推荐资料的课程）、背景切换、课程搜索
+DEFAULT_MIX = {"upload": 2, "manual_add": 4, "filter": 3, "background": 1, "search": 3}
+# 筛选动作依次尝试的下拉框（按标签前缀）：3.py有星期筛选，1.py/2.py只有推荐资料的课程选择
+FILTER_SELECTBOXES = ["筛选星期", "选择课程"]
+# 可交互的控件类型（Element proto中的字段名）
+WIDGET_TYPES = {"text_input", "button", "selectbox", "radio", "file_uploader", "color_picker"}
+
+
+# ---------------------- 测试数据生成 ----------------------
+def random_course(rng):
+    start = rng.randrange(8 * 60, 20 * 60, 10)
+    end = start + rng.choice([45, 90, 100])
+    return [
+        rng.choice(COURSE_NAMES),
+        rng.choice(WEEKDAYS),
+        f"{start // 60:02d}:{start % 60:02d}",
+        f"{end // 60:02d}:{end % 60:02d}",
+        f"教学楼{rng.choice('ABCD')}{rng.randint(101, 505)}",
+        rng.choice(TEACHERS),
+    ]
+
+
+def random_csv(rng, rows):
+    lines = ["课程名称,星期,开始时间,结束时间,教室,任课老师"]
+    lines += [",".join(random_course(rng)) for _ in range(rows)]
+    return "\n".join(lines).encode("utf-8-sig")
+
+
+# ---------------------- 被测服务进程 ----------------------
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """
+    以子进程方式启动被测应用，退出时自动关闭
+    """
+
+    def __init__(self, app_path, startup_timeout=60):
+        self.port = free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", app_path,
+             "--server.headless", "true",
+             "--server.port", str(self.port),
+             "--server.address", "127.0.0.1",
+             "--server.enableCORS", "false",
+             "--server.enableXsrfProtection", "false",
+             "--server.fileWatcherType", "none",
+             "--browser.gatherUsageStats", "false"],
+            cwd=os.path.dirname(app_path),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.time() + startup_timeout
+        while time.time() < deadline:
+            try:
+                if requests.get(f"{self.base_url}/_stcore/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"服务启动超时：{app_path}")
+
+    def rss_mb(self):
+        """
+        服务进程常驻内存（MB），读取/proc（仅Linux）；无法读取时返回0
+        """
+        try:
+            with open(f"/proc/{self.process.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            pass
+        return 0.0
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# ---------------------- 模拟会话（脚本化客户端） ----------------------
+class ClientSession:
+    """
+    一个模拟用户：持有一条websocket连接，像浏览器一样发送rerun请求并等待脚本运行结束
+    保存各控件的当前状态（文本、选项、上传文件），按钮为一次性触发
+    页面上暂时不存在的控件（如1.py没有背景设置、课表为空时没有筛选）对应的动作会跳过，按动作类型计数
+    """
+
+    def __init__(self, ws, server, rng, csv_rows, timeout):
+        self.ws = ws        # 已建立的websocket连接（由调用方以with管理生命周期）
+        self.server = server
+        self.rng = rng
+        self.csv_rows = csv_rows
+        self.timeout = timeout
+        self.session_id = None
+        self.widgets = []   # 最近一次运行渲染出的控件：[(类型, proto)]
+        self.states = {}    # 控件ID -> WidgetState（持久值）
+        self.latencies = []
+        self.errors = 0
+        self.done = Counter()     # 动作类型 -> 实际执行次数
+        self.skipped = Counter()  # 动作类型 -> 因控件不存在而跳过的次数
+        self.rerun()
+
+    def _recv(self):
+        msg = ForwardMsg()
+        msg.ParseFromString(self.ws.recv(timeout=self.timeout))
+        return msg
+
+    def _handle(self, msg):
+        msg_type = msg.WhichOneof("type")
+        if msg_type == "new_session":
+            self.session_id = msg.new_session.initialize.session_id or self.session_id
+            self.widgets = []
+        elif msg_type == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            kind = element.WhichOneof("type")
+            if kind in WIDGET_TYPES:
+                self.widgets.append((kind, getattr(element, kind)))
+            elif kind == "exception":
+                self.errors += 1
+        return msg_type
+
+    def rerun(self, triggers=()):
+        state = ClientState(query_string="", page_script_hash="")
+        state.widget_states.widgets.extend(list(self.states.values()) + list(triggers))
+        start = time.perf_counter()
+        self.ws.send(BackMsg(rerun_script=state).SerializeToString())
+        while True:
+            msg = self._recv()
+            if self._handle(msg) == "script_finished":
+                if msg.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+        self.latencies.append(time.perf_counter() - start)
+
+    def find(self, kind, prefix):
+        for widget_kind, proto in self.widgets:
+            if widget_kind == kind and proto.label.startswith(prefix):
+                return proto
+        return None
+
+    def _set_string(self, proto, value):
+        self.states[proto.id] = WidgetState(id=proto.id, string_value=value)
+
+    # ---------- 动作 ----------
+    def upload(self):
+        uploader = next((p for k, p in self.widgets if k == "file_uploader" and ".csv" in p.type), None)
+        if uploader is None or self.session_id is None:
+            return False
+        content = random_csv(self.rng, self.csv_rows)
+        request_id = uuid.uuid4().hex
+        request = FileURLsRequest(request_id=request_id, file_names=["课程表.csv"], session_id=self.session_id)
+        self.ws.send(BackMsg(file_urls_request=request).SerializeToString())
+        while True:
+            msg = self._recv()
+            if self._handle(msg) == "file_urls_response" and msg.file_urls_response.response_id == request_id:
+                file_urls = msg.file_urls_response.file_urls[0]
+                break
+        requests.put(
+            self.server.base_url + file_urls.upload_url,
+            files={"file": ("课程表.csv", content, "text/csv")},
+            timeout=self.timeout,
+        ).raise_for_status()
+        state = WidgetState(id=uploader.id)
+        info = state.file_uploader_state_value.uploaded_file_info.add()
+        info.file_id = file_urls.file_id
+        info.name = "课程表.csv"
+        info.size = len(content)
+        info.file_urls.CopyFrom(file_urls)
+        self.states[uploader.id] = state
+        return True
+
+    def manual_add(self):
+        name, weekday, start, end, room, teacher = random_course(self.rng)
+        fields = {"课程名称": name, "开始时间": start, "结束时间": end, "教室": room, "任课老师": teacher}
+        button = next((p for k, p in self.widgets if k == "button" and "添加课程" in p.label), None)
+        if button is None:
+            return False
+        for prefix, value in fields.items():
+            widget = self.find("text_input", prefix)
+            if widget is None:
+                return False
+            self._set_string(widget, value)
+        self._set_string(self.find("selectbox", "星期"), weekday)
+        return [WidgetState(id=button.id, trigger_value=True)]
+
+    def filter(self):
+        widget = next((w for w in (self.find("selectbox", prefix) for prefix in FILTER_SELECTBOXES) if w is not None), None)
+        if widget is None or not widget.options:
+            return False
+        self._set_string(widget, self.rng.choice(list(widget.options)))
+        return True
+
+    def background(self):
+        widget = self.find("radio", "背景类型")
+        if widget is None:
+            return False
+        self._set_string(widget, self.rng.choice(list(widget.options)))
+        return True
+
+    def search(self):
+        widget = self.find("text_input", "🔍")
+        if widget is None:
+            return False
+        self._set_string(widget, self.rng.choice(COURSE_NAMES + TEACHERS)[:2])
+        return True
+
+    def run_actions(self, count, mix):
+        actions = list(mix)
+        weights = [mix[action] for action in actions]
+        done = attempts = 0
+        while done < count and attempts < count * 10:
+            attempts += 1
+            action = self.rng.choices(actions, weights)[0]
+            result = getattr(self, action)()
+            if result:
+                self.rerun(result if isinstance(result, list) else ())
+                self.done[action] += 1
+                done += 1
+            else:
+                self.skipped[action] += 1
+
+
+# ---------------------- 指标统计 ----------------------
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def format_counts(counter, mix):
+    return " ".join(f"{action}={counter[action]}" for action in mix if counter[action])
+
+
+def run_level(server, app_name, concurrency, actions, csv_rows, mix, seed, timeout):
+    """
+    以指定并发数运行一轮压测（所有会话连接就绪后同时开始），返回该并发级别的统计结果
+    会话启动或运行失败时不会卡住其他会话：失败原因计入failed_sessions并打印
+    """
+    started = []
+    # 等待就绪带超时；任一会话启动失败时abort，其余会话立即退出等待
+    barrier = threading.Barrier(concurrency, action=lambda: started.append(time.perf_counter()), timeout=timeout)
+    failures = []
+    ws_url = server.base_url.replace("http://", "ws://") + "/_stcore/stream"
+    peak_rss = [server.rss_mb()]
+    stop_sampling = threading.Event()
+
+    def sample_rss():
+        while not stop_sampling.wait(0.2):
+            peak_rss.append(server.rss_mb())
+
+    def worker(index):
+        rng = random.Random(seed * 100003 + concurrency * 1009 + index)
+        session = None
+        try:
+            with connect(ws_url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout) as ws:
+                try:
+                    session = ClientSession(ws, server, rng, csv_rows, timeout)
+                except Exception:
+                    barrier.abort()
+                    raise
+                session.latencies.clear()  # 首次加载不计入
+                barrier.wait()
+                session.run_actions(actions, mix)
+        except threading.BrokenBarrierError:
+            failures.append(f"会话{index}：其他会话未能就绪，已放弃")
+        except Exception as e:
+            failures.append(f"会话{index}：{type(e).__name__}: {e}")
+        return session
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        sessions = [session for session in pool.map(worker, range(concurrency)) if session is not None]
+    elapsed = time.perf_counter() - started[0] if started else 0.0
+    stop_sampling.set()
+    sampler.join()
+    for failure in failures:
+        print(f"[{app_name}] 并发{concurrency}：{failure}", file=sys.stderr, flush=True)
+
+    latencies = [latency for session in sessions for latency in session.latencies]
+    done = sum((session.done for session in sessions), Counter())
+    skipped = sum((session.skipped for session in sessions), Counter())
+    return {
+        "app": app_name,
+        "concurrency": concurrency,
+        "reruns": len(latencies),
+        "errors": sum(session.errors for session in sessions),
+        "failed_sessions": len(failures),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "rss_mb": round(server.rss_mb(), 1),
+        "peak_rss_mb": round(max(peak_rss), 1),
+        "actions_done": format_counts(done, mix),
+        "actions_skipped": format_counts(skipped, mix),
+    }
+
+
+def print_table(rows):
+    headers = list(rows[0])
+    widths = [max(len(str(h)), *(len(str(row[h])) for row in rows)) for h in headers]
+    print("  ".join(str(h).rjust(w) for h, w in zip(headers, widths)))
+    for row in rows:
+        print("  ".join(str(row[h]).rjust(w) for h, w in zip(headers, widths)))
+
+
+# ---------------------- 命令行入口 ----------------------
+def parse_mix(text):
+    mix = dict(DEFAULT_MIX)
+    for item in filter(None, text.split(",")):
+        action, weight = item.split("=")
+        if action not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"未知动作：{action}（可选：{list(DEFAULT_MIX)}）")
+        mix[action] = float(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="课程表Streamlit应用并发压测")
+    parser.add_argument("--app", action="append", help="被测脚本（可重复指定），默认1.py")
+    parser.add_argument("--concurrency", default="1,5,10,20", help="并发会话数列表，逗号分隔")
+    parser.add_argument("--actions", type=int, default=20, help="每个会话执行的动作数")
+    parser.add_argument("--csv-rows", type=int, default=30, help="每次CSV导入的行数")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_MIX),
+                        help="动作配比，如 upload=1,manual_add=5（未指定的保持默认）")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=60, help="单次rerun超时（秒）")
+    parser.add_argument("--output", help="结果另存为CSV（便于绘制并发-延迟/内存曲线）")
+    args = parser.parse_args()
+
+    results = []
+    for app in args.app or ["1.py"]:
+        app_path = app if os.path.isabs(app) else os.path.join(APP_DIR, app)
+        app_name = os.path.basename(app_path)
+        with AppServer(app_path) as server:
+            for concurrency in (int(n) for n in args.concurrency.split(",")):
+                row = run_level(server, app_name, concurrency, args.actions, args.csv_rows,
+                                args.mix, args.seed, args.timeout)
+                results.append(row)
+                print(f"[{app_name}] 并发{concurrency}：p50={row['p50_ms']}ms p99={row['p99_ms']}ms "
+                      f"吞吐={row['throughput_rps']}次/秒 RSS={row['rss_mb']}MB "
+                      f"执行[{row['actions_done']}] 跳过[{row['actions_skipped'] or '无'}]", flush=True)
+
+    print()
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+        print(f"结果已保存：{args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import pandas as pd
+
+try:
+    # 在Streamlit中运行时，借助运行时的会话管理器判断会话是否已被关闭
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:
+    Runtime = None
+
+# ---------------------- 会话内存管理：空闲会话课表换出到磁盘 ----------------------
+# 每次脚本运行开始时从管理器取出本会话的课表（已换出则从磁盘加载），运行结束时交还；
+# 两次交互之间课表只由管理器持有，因此可以按 空闲超时(TTL) + 全局内存上限(LRU) 换出到磁盘
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+
+def _session_manager():
+    # 会话管理器是运行时的私有属性：取不到时（其他Streamlit版本、AppTest的模拟运行时）视为无法判断
+    if Runtime is None or not Runtime.exists():
+        return None
+    return getattr(Runtime.instance(), "_session_mgr", None)
+
+
+def streamlit_session_id():
+    """
+    当前脚本运行所属的Streamlit会话ID；不在Streamlit服务中运行（如AppTest、裸模式）时返回None
+    """
+    ctx = get_script_run_ctx() if Runtime is not None else None
+    manager = _session_manager()
+    if ctx is None or manager is None or manager.get_session_info(ctx.session_id) is None:
+        return None
+    return ctx.session_id
+
+
+def streamlit_session_closed(session_id):
+    """
+    会话是否已被Streamlit关闭（标签页关闭且超过重连保留期）；无法判断时一律按未关闭处理
+    """
+    manager = _session_manager()
+    try:
+        return manager is not None and manager.get_session_info(session_id) is None
+    except Exception:
+        return False
+
+
+class MemoryGovernor:
+    """
+    会话内存管理器（所有会话共享一个实例，线程安全）
+    - load(user_id, session_id)：取出课表和检索索引；已换出的课表透明地从磁盘加载（检索索引属派生数据，换出时直接丢弃，
+      下次渲染时按课表重建）
+    - store(user_id, ...)：交还课表，记录占用（课表 + 派生数据 + 不可换出的附加占用）并执行换出策略
+    - stats()：换出/加载次数、常驻内存等指标
+    换出文件只在会话确认已关闭（session_closed回调返回True）时删除；无法判断时一直保留，空闲再久也不删
+    """
+
+    def __init__(self, memory_cap_mb=512, idle_ttl=15 * 60, spill_dir=None, session_closed=None, on_release=None,
+                 cleanup_interval=60):
+        self.memory_cap = memory_cap_mb * 1024 * 1024
+        self.idle_ttl = idle_ttl                  # 超过该秒数无交互的会话换出到磁盘
+        self.session_closed = session_closed      # session_id -> 是否已关闭；None时从不删除会话数据
+        self.on_release = on_release              # 会话换出/删除时的回调（如从提醒引擎移除其课表副本）
+        self.cleanup_interval = cleanup_interval  # 检查已关闭会话的最小间隔（秒）
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix="course_spill_")
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._resident = OrderedDict()  # user_id -> {"courses", "search_index", "bytes", "derived_bytes"}，按最近使用排序
+        self._extra_bytes = {}          # user_id -> 不可换出的占用（如背景图片、利用率汇总）
+        self._spilled = {}              # user_id -> (文件路径, 换出前字节数, 文件字节数)
+        self._spilling = {}             # user_id -> 正在写盘的条目（写盘期间会话回来时直接取回）
+        self._last_seen = {}            # user_id -> 最近一次交互时间
+        self._session_ids = {}          # user_id -> Streamlit会话ID（用于判断会话是否已关闭）
+        self._running = set()           # 正在运行脚本的会话（不换出）
+        self._last_cleanup = time.time()
+        self.metrics = {"spills": 0, "reloads": 0, "spilled_bytes": 0, "reloaded_bytes": 0, "dropped": 0}
+
+    # ---------- 会话接口 ----------
+    def load(self, user_id, session_id=None):
+        """
+        脚本运行开始时调用，返回(课表, 检索索引)；新会话返回(None, None)
+        session_id为所属的Streamlit会话，会话关闭后其数据才会被删除
+        """
+        with self._lock:
+            self._running.add(user_id)
+            self._last_seen[user_id] = time.time()
+            if session_id is not None:
+                self._session_ids[user_id] = session_id
+            entry = self._resident.get(user_id)
+            if entry is None and user_id in self._spilling:
+                entry = self._resident[user_id] = self._spilling.pop(user_id)
+            if entry is not None:
+                self._resident.move_to_end(user_id)
+                return entry["courses"], entry["search_index"]
+            spilled = self._spilled.pop(user_id, None)
+        if spilled is None:
+            return None, None
+        path, size, _ = spilled
+        courses = pd.read_pickle(path)
+        os.remove(path)
+        with self._lock:
+            self.metrics["reloads"] += 1
+            self.metrics["reloaded_bytes"] += size
+            self._resident[user_id] = {"courses": courses, "search_index": None, "bytes": size, "derived_bytes": 0}
+        return courses, None
+
+    def store(self, user_id, courses, search_index=None, derived_bytes=0, extra_bytes=0):
+        """
+        脚本运行结束时调用：交还课表（课表未变化时沿用上次统计的占用，避免重复深度统计）
+        derived_bytes：随课表换出一起释放的派生数据（检索索引按其计数器估算，另加如提醒引擎中的副本）
+        extra_bytes：换出后仍常驻的占用，同样计入上限
+        """
+        with self._lock:
+            entry = self._resident.pop(user_id, None)
+            if entry is not None and entry["courses"] is courses:
+                size = entry["bytes"]
+            else:
+                size = frame_bytes(courses)
+            derived_bytes += search_index.memory_bytes() if search_index is not None else 0
+            stale = self._spilled.pop(user_id, None)
+            self._spilling.pop(user_id, None)
+            self._resident[user_id] = {"courses": courses, "search_index": search_index, "bytes": size, "derived_bytes": derived_bytes}
+            self._extra_bytes[user_id] = extra_bytes
+            self._last_seen[user_id] = time.time()
+            self._running.discard(user_id)
+            victims = self._pick_victims(exclude=user_id)
+        if stale is not None:
+            os.remove(stale[0])
+        for victim, entry in victims:
+            self._spill(victim, entry)
+
+    # ---------- 换出策略 ----------
+    def _resident_bytes(self):
+        return sum(entry["bytes"] + entry["derived_bytes"] for entry in self._resident.values()) + sum(self._extra_bytes.values())
+
+    def _pick_victims(self, exclude):
+        # 1) Streamlit已关闭的会话直接丢弃；2) 超过idle_ttl的会话换出；3) 仍超上限时按LRU继续换出
+        now = time.time()
+        if self.session_closed is not None and now - self._last_cleanup > self.cleanup_interval:
+            self._last_cleanup = now
+            for user_id, session_id in list(self._session_ids.items()):
+                if user_id not in self._running and self.session_closed(session_id):
+                    self._forget(user_id)
+        victims = []
+        total = self._resident_bytes()
+        for user_id, entry in list(self._resident.items()):
+            idle = now - self._last_seen[user_id] > self.idle_ttl
+            if user_id == exclude or (user_id in self._running and not idle):
+                continue
+            if not idle and total <= self.memory_cap:
+                continue
+            del self._resident[user_id]
+            total -= entry["bytes"] + entry["derived_bytes"]
+            if len(entry["courses"]):
+                # 空课表无需写盘：下次加载时按新会话处理即可
+                self._spilling[user_id] = entry
+                victims.append((user_id, entry))
+        return victims
+
+    def _spill(self, user_id, entry):
+        # 写盘在锁外进行，避免阻塞其他会话；gzip低压缩级别兼顾体积和速度
+        path = os.path.join(self.spill_dir, f"{user_id}-{uuid.uuid4().hex[:8]}.pkl.gz")
+        tmp_path = path + ".tmp"
+        entry["courses"].to_pickle(tmp_path, compression={"method": "gzip", "compresslevel": 1})
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._spilling.get(user_id) is not entry:
+                # 写盘期间会话又回来了（已取回或交还了新课表）：以内存中的数据为准
+                os.remove(path)
+                return
+            del self._spilling[user_id]
+            self._spilled[user_id] = (path, entry["bytes"], os.path.getsize(path))
+            self.metrics["spills"] += 1
+            self.metrics["spilled_bytes"] += entry["bytes"]
+            # 在锁内释放派生数据：会话之后回来时一定会看到已换出状态，并重新注册
+            if self.on_release is not None:
+                self.on_release(user_id)
+
+    def _forget(self, user_id):
+        self._resident.pop(user_id, None)
+        self._spilling.pop(user_id, None)
+        self._extra_bytes.pop(user_id, None)
+        self._last_seen.pop(user_id, None)
+        self._session_ids.pop(user_id, None)
+        self._running.discard(user_id)
+        spilled = self._spilled.pop(user_id, None)
+        if spilled is not None and os.path.exists(spilled[0]):
+            os.remove(spilled[0])
+        if self.on_release is not None:
+            self.on_release(user_id)
+        self.metrics["dropped"] += 1
+
+    # ---------- 指标 ----------
+    def stats(self):
+        with self._lock:
+            return {
+                **self.metrics,
+                "resident_sessions": len(self._resident),
+                "spilled_sessions": len(self._spilled),
+                "resident_mb": round(self._resident_bytes() / 1024 / 1024, 2),
+                "memory_cap_mb": round(self.memory_cap / 1024 / 1024, 2),
+                "spill_dir_mb": round(sum(file_bytes for _, _, file_bytes in self._spilled.values()) / 1024 / 1024, 2),
+            }
+
+    def close(self):
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
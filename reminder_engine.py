@@ -0,0 +1,165 @@
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+import pytz
+
+# ---------------------- 服务端批量课程提醒引擎 ----------------------
+# 所有会话共用一个引擎实例：各用户的课程开始时间合并在同一张列式表中，
+# 每个tick（按分钟）只做一次向量化查询，会话页面/通知渠道直接读取结果
+
+WEEKDAYS = ["周一", "周二", "周三", "周四", "周五", "周六", "周日"]
+# 提醒结果中携带的课程字段（页面展示用）
+REMINDER_FIELDS = ["课程名称", "开始时间", "结束时间", "教室"]
+
+
+def to_columnar(courses):
+    """
+    把单个用户的课程表转换为列式结构：星期编号(0-6) + 开始分钟数(0-1439) + 展示字段
+    时间格式非法/星期非法的行直接丢弃（不参与提醒）
+    """
+    if courses.empty:
+        return pd.DataFrame({
+            "weekday": pd.Series(dtype="int8"),
+            "start_min": pd.Series(dtype="int16"),
+            **{col: pd.Series(dtype="object") for col in REMINDER_FIELDS},
+        })
+    weekday = courses["星期"].map({name: idx for idx, name in enumerate(WEEKDAYS)})
+    start = pd.to_datetime(courses["开始时间"], format="%H:%M", errors="coerce")
+    valid = weekday.notna() & start.notna()
+    frame = courses.loc[valid, REMINDER_FIELDS].reset_index(drop=True)
+    frame.insert(0, "start_min", (start[valid].dt.hour * 60 + start[valid].dt.minute).astype("int16").to_numpy())
+    frame.insert(0, "weekday", weekday[valid].astype("int8").to_numpy())
+    return frame
+
+
+class ReminderEngine:
+    """
+    批量提醒引擎：按用户保存列式课程数据，按分钟tick统一计算“接下来N分钟内开课”的用户及课程
+    线程安全（Streamlit每个会话运行在独立线程中）
+    """
+
+    def __init__(self, window_minutes=15, idle_ttl=6 * 3600, timezone="Asia/Shanghai"):
+        self.window_minutes = window_minutes
+        self.idle_ttl = idle_ttl  # 超过该秒数未访问的用户自动移出引擎
+        self.tz = pytz.timezone(timezone)
+        self._lock = threading.Lock()
+        self._frames = {}       # user_id -> 该用户的列式课程数据
+        self._frame_bytes = {}  # user_id -> 列式数据占用（更新时统计一次）
+        self._last_seen = {}    # user_id -> 最近一次访问时间戳
+        self._table = None      # 所有用户合并后的列式总表（懒重建）
+        self._dirty = True      # 总表是否需要重建
+        self._tick_key = None   # 最近一次tick对应的(星期, 分钟, 是否整分)
+        self._results = {}      # user_id -> 本tick命中的课程列表
+
+    # ---------- 数据维护 ----------
+    def update_user(self, user_id, courses):
+        """
+        课表变更（添加/导入/清空）后调用，替换该用户在引擎中的数据
+        已经tick过的当前分钟内，只对该用户单独补算一次，不重建总表
+        """
+        frame = to_columnar(courses)
+        size = int(frame.memory_usage(deep=True).sum())
+        with self._lock:
+            self._frames[user_id] = frame
+            self._frame_bytes[user_id] = size
+            self._last_seen[user_id] = time.time()
+            self._dirty = True
+            if self._tick_key is not None:
+                hits = frame[self._window_mask(frame, *self._tick_key)]
+                self._store_result(user_id, hits)
+
+    def has_user(self, user_id):
+        with self._lock:
+            return user_id in self._frames
+
+    def user_bytes(self, user_id):
+        # 该用户数据在引擎中的占用：自身列式数据 + 合并总表中的一份副本
+        with self._lock:
+            return 2 * self._frame_bytes.get(user_id, 0)
+
+    def remove_user(self, user_id):
+        with self._lock:
+            self._frames.pop(user_id, None)
+            self._frame_bytes.pop(user_id, None)
+            self._last_seen.pop(user_id, None)
+            self._results.pop(user_id, None)
+            self._dirty = True
+
+    # ---------- 批量计算 ----------
+    def _window_mask(self, frame, weekday, now_min, exact):
+        # 判定：今天的课程，且 当前时间 <= 开始时间 <= 当前时间+N分钟（与逐行比较完整时间的结果一致：
+        # 当前分钟开始的课程只有在整分时刻才算“尚未开始”，如07:50:30不再提醒07:50的课）
+        started = frame["start_min"] < now_min if exact else frame["start_min"] <= now_min
+        return (
+            (frame["weekday"] == weekday)
+            & ~started
+            & (frame["start_min"] <= now_min + self.window_minutes)
+        )
+
+    def _store_result(self, user_id, hits):
+        if hits.empty:
+            self._results.pop(user_id, None)
+        else:
+            self._results[user_id] = hits[REMINDER_FIELDS].to_dict("records")
+
+    def _rebuild_table(self):
+        frames = [frame.assign(user_id=user_id) for user_id, frame in self._frames.items() if not frame.empty]
+        if frames:
+            table = pd.concat(frames, ignore_index=True)
+            table["user_id"] = table["user_id"].astype("category")
+        else:
+            table = to_columnar(pd.DataFrame()).assign(user_id=pd.Series(dtype="category"))
+        self._table = table
+        self._dirty = False
+
+    def _prune_idle(self, now_ts):
+        expired = [uid for uid, seen in self._last_seen.items() if now_ts - seen > self.idle_ttl]
+        for uid in expired:
+            self._frames.pop(uid, None)
+            self._frame_bytes.pop(uid, None)
+            self._last_seen.pop(uid, None)
+            self._dirty = True
+
+    def tick(self, now=None):
+        """
+        计算当前分钟所有用户的提醒结果；同一分钟内重复调用直接复用上次结果（整分时刻单独计算一次）
+        返回：{user_id: [课程字典, ...]}（副本，调用方遍历时不受其他会话更新影响）
+        """
+        now = now or datetime.now(self.tz)
+        key = (now.weekday(), now.hour * 60 + now.minute, now.second == 0 and now.microsecond == 0)
+        with self._lock:
+            if key == self._tick_key:
+                return dict(self._results)
+            self._prune_idle(time.time())
+            if self._dirty:
+                self._rebuild_table()
+            hits = self._table[self._window_mask(self._table, *key)]
+            self._results = {}
+            for user_id, group in hits.groupby("user_id", observed=True, sort=False):
+                self._store_result(user_id, group)
+            self._tick_key = key
+            return dict(self._results)
+
+    # ---------- 结果读取 ----------
+    def get_upcoming(self, user_id, now=None):
+        """
+        读取某个用户接下来N分钟内要开始的课程（列表，元素为课程字典）
+        """
+        self.tick(now)
+        with self._lock:
+            if user_id in self._last_seen:
+                self._last_seen[user_id] = time.time()
+            return list(self._results.get(user_id, []))
+
+    def stats(self):
+        """
+        引擎概况：用户数、课程总行数、当前tick命中的用户数
+        """
+        with self._lock:
+            return {
+                "users": len(self._frames),
+                "rows": sum(len(frame) for frame in self._frames.values()),
+                "notified_users": len(self._results),
+            }